@@ -1,18 +1,66 @@
 import os
 import csv
 from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.shapes.shapetree import SlideShapeFactory
 from pptx.dml.color import RGBColor
 from pptx.util import Inches, Pt
 from pptx.enum.text import MSO_AUTO_SIZE
 import argparse
+import logging
 import subprocess
-import base64
-import requests
-from concurrent.futures import ThreadPoolExecutor
+import io
+import pybase64
+from PIL import Image, UnidentifiedImageError
+import json
+from blake3 import blake3
+import asyncio
+import aiohttp
+import queue
+from collections import deque
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
 import subprocess
 
-executor = ThreadPoolExecutor(max_workers=4)  # Customize thread count per system
+# Per-image diagnostics go through logging so the hot path never takes the stdout lock unless asked to
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+MAX_CONCURRENT_CAPTIONS = 6  # In-flight LLaVA requests; keep within Ollama's parallel limit
+BATCH_MAX_SIZE = 8
+BATCH_TIMEOUT_MS = 50
+PIPELINE_DEPTH = 8  # Jobs the slide walk may queue ahead, and jobs dispatched but not yet captioned
+OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
+OLLAMA_KEEP_ALIVE_SECONDS = 60 * 60  # Keep LLaVA (and its prompt KV cache) loaded between captions and uploads
+OLLAMA_KEEP_ALIVE = f"{OLLAMA_KEEP_ALIVE_SECONDS}s"
+LLAVA_MAX_IMAGE_SIZE = (672, 672)  # LLaVA downsamples internally, so larger inputs only cost bandwidth
+LLAVA_JPEG_QUALITY = 85
+# 25 words is well under 50 tokens; the cap bounds decode time if the model ignores the instruction
+LLAVA_OPTIONS = {"num_predict": 50, "temperature": 0.2, "stop": ["\n\n"]}
+OLLAMA_TIMEOUT = aiohttp.ClientTimeout(total=300, sock_connect=3)
+OLLAMA_WARM_UP_TIMEOUT = aiohttp.ClientTimeout(total=60, sock_connect=3)
+# Key is caption_cache_key(); it lets a resumed run tell whether the image or its slide context changed
+CAPTIONS_CSV_HEADER = ["Slide", "Context", "Image", "Caption", "Key"]
+
+# Shared by every caption request; kept as the leading text of the system message so its prefill is reused
+CAPTION_INSTRUCTIONS = (
+    "You are generating a short caption for an image on a presentation slide.\n"
+    "Focus mainly on the **Slide Content** section.\n"
+    "Only refer to **Related Slide Hints** if the Slide Content is vague or missing.\n"
+    "The caption must be concise and strictly no more than 25 words."
+)
+_prompt_cache_warmed_at = None  # time.monotonic() of the last successful warm-up
+
+# Caption textbox styling, shared by every caption
+_CAP_TOP_PAD = Inches(0.1)
+_CAP_H = Inches(0.4)
+_CAP_FONT = Pt(10)
+_BLACK = RGBColor(0, 0, 0)
+_WHITE = RGBColor(255, 255, 255)
+_GREY = RGBColor(200, 200, 200)
+
+_jpeg_buffer_pool = deque(maxlen=MAX_CONCURRENT_CAPTIONS)  # Reused BytesIO buffers for downscaled images
 
 def ensure_ollama_llava_running():
     try:
@@ -32,7 +80,58 @@ def convert_ppt_to_pptx(filepath):
         "--outdir", input_dir
     ], check=True)
 
+class AsyncBatcher:
+    """Groups caption requests that arrive within a short window into one batch call."""
+
+    def __init__(self, batch_fn, max_batch_size=BATCH_MAX_SIZE, timeout_ms=BATCH_TIMEOUT_MS):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout_ms / 1000
+        self._pending = []
+        self._flush_handle = None
+        self._running = set()
+
+    def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.timeout, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
 class PowerPointExtractor:
+    # Every embedded image, including filled picture placeholders, is a <p:pic>, either at the top level or inside groups.
+    # Video and audio shapes are <p:pic> too (their poster frame is a blip), so they're excluded like python-pptx's MEDIA type.
+    _NOT_MEDIA = '[not(p:nvPicPr/p:nvPr/a:videoFile or p:nvPicPr/p:nvPr/a:audioFile)]'
+    PICTURE_XPATH = f'./p:cSld/p:spTree/p:pic{_NOT_MEDIA} | ./p:cSld/p:spTree//p:grpSp/p:pic{_NOT_MEDIA}'
+    TOP_MARGIN_EMU = 360000  # Images above this line are headers/logos and don't get captions
+
     def __init__(self, ppt_path, session_dir):
         self.ppt_path = ppt_path
         self.session_dir = session_dir
@@ -40,38 +139,77 @@ class PowerPointExtractor:
         os.makedirs(self.image_output_dir, exist_ok=True)
         self.cur_image_index = 0
         self.invalid_images = []
+        self.pending_writes = []
+        self.caption_cache_path = os.path.join(session_dir, "caption_cache.json")
+        self.caption_cache = self.load_caption_cache()
+
+    def load_caption_cache(self):
+        if not os.path.exists(self.caption_cache_path):
+            return {}
+        try:
+            with open(self.caption_cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable caption cache {self.caption_cache_path}: {e}")
+            return {}
+        # Earlier versions cached this placeholder when Ollama failed; drop it so those images are retried
+        return {key: caption for key, caption in cache.items() if caption != "[No caption generated]"}
+
+    def save_caption_cache(self):
+        with open(self.caption_cache_path, 'w', encoding="utf-8") as f:
+            json.dump(self.caption_cache, f)
+
+    def caption_cache_key(self, image_bytes, context_text):
+        # Same image with the same slide context always gets the same caption
+        return f"{blake3(image_bytes).hexdigest()}:{blake3(context_text.encode()).hexdigest()}"
 
     def save_image(self, image, name):
+        # image is anything with .blob and .ext, e.g. the slide's ImagePart
         image_bytes = image.blob
         name = name + f'_{self.cur_image_index}.{image.ext}'
         full_path = os.path.join(self.image_output_dir, os.path.basename(name))
-        print(full_path) #printing to showcase multithreading
-        with open(full_path, 'wb') as f:
-            f.write(image_bytes)
+        logger.debug("Extracted %s", full_path)
+        # The blob is already in memory; captioning uses it directly while the artifact is written in the background
+        loop = asyncio.get_running_loop()
+        self.pending_writes.append(loop.run_in_executor(None, Path(full_path).write_bytes, image_bytes))
         self.cur_image_index += 1
-        return os.path.basename(full_path)
+        return os.path.basename(full_path), image_bytes
 
-    def drill_for_images(self, shape, slide_idx, name):
+    def skip_top_margin(self, shape, slide_idx, top):
+        # Checked before save_image so header images are never extracted or written
+        if top is not None and top < self.TOP_MARGIN_EMU:
+            logger.debug("Skipping image %s on slide %d (too close to top)", shape.name, slide_idx)
+            return True
+        return False
+
+    def find_slide_images(self, slide, slide_idx, name):
+        # One lxml pass over the shape tree; Shape objects are only built for the pictures it finds
         image_tuples = []
-        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-            for s in shape.shapes:
-                image_tuples.extend(self.drill_for_images(s, slide_idx, name))
-        elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-            try:
-                saved_image = self.save_image(shape.image, name)
-                image_tuples.append((saved_image, shape))
-            except:
-                print(f'Could not process image {shape.name} on slide {slide_idx}.')
+        for pic in slide.element.xpath(self.PICTURE_XPATH):
+            shape = SlideShapeFactory(pic, slide.shapes)
+
+            # Grouped pictures use their top-level group's position, since child offsets aren't in slide space
+            groups = pic.xpath('ancestor::p:grpSp[parent::p:spTree]')
+            top = SlideShapeFactory(groups[0], slide.shapes).top if groups else shape.top
+            if self.skip_top_margin(shape, slide_idx, top):
+                continue
+
+            image_part = None
+            if pic.blip_rId is not None:
+                try:
+                    image_part = slide.part.related_part(pic.blip_rId)
+                except KeyError:
+                    pass
+
+            if image_part is None or not image_part.blob:
+                logger.debug("Could not process image %s on slide %d", shape.name, slide_idx)
                 self.invalid_images.append(f'Slide {slide_idx}: {shape.name}')
-                image_tuples.append((f'INVALID: {shape.name}', None))
-        else:
-            try:
-                if hasattr(shape, 'image'):
-                    saved_image = self.save_image(shape.image, name)
-                    image_tuples.append((saved_image, shape))
-            except:
-                pass
-        return image_tuples 
+                image_tuples.append((f'INVALID: {shape.name}', None, None))
+                continue
+
+            saved_image, image_bytes = self.save_image(image_part, name)
+            image_tuples.append((saved_image, image_bytes, shape))
+        return image_tuples
 
     def get_slide_text(self, slide):
         text = "\n".join([
@@ -80,17 +218,18 @@ class PowerPointExtractor:
         ])
         return "\n".join([line for line in text.splitlines() if line.strip()])
 
-    def get_context_text(self, slides, current_index, window=1):
-        main_slide_text = self.get_slide_text(slides[current_index])
+    def get_context_text(self, slide_texts, current_index, window=1):
+        # slide_texts holds get_slide_text() for every slide, extracted once per file
+        main_slide_text = slide_texts[current_index]
         context_parts = [f"Slide Content:\n{main_slide_text.strip()}"]
 
-        total = len(slides)
+        total = len(slide_texts)
         neighbor_texts = []
         for offset in range(-window, window + 1):
             idx = current_index + offset
             if idx == current_index or not (0 <= idx < total):
                 continue
-            neighbor_slide_text = self.get_slide_text(slides[idx])
+            neighbor_slide_text = slide_texts[idx]
             if neighbor_slide_text.strip():
                 neighbor_texts.append(neighbor_slide_text)
 
@@ -99,35 +238,186 @@ class PowerPointExtractor:
 
         return "\n\n".join(context_parts)
 
-    def generate_llava_caption(self, image_path, context_text):
-        with open(image_path, "rb") as img_file:
-            image_b64 = base64.b64encode(img_file.read()).decode()
-
-        prompt = (
-            "You are generating a short caption for an image on a presentation slide.\n"
-            "Focus mainly on the **Slide Content** section.\n"
-            "Only refer to **Related Slide Hints** if the Slide Content is vague or missing.\n"
-            "The caption must be concise and strictly no more than 25 words.\n\n"
-            f"{context_text.strip()}\n\nCaption:"
-        )
-
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llava",
-                "prompt": prompt,
-                "images": [image_b64],
-                "stream": False
-            }
-        )
-        result = response.json()
-        return result.get("response", "[No caption generated]")
+    def build_caption_prefix(self, context_text):
+        # Identical for every image on a slide, so Ollama can reuse its cached prefill
+        return f"{CAPTION_INSTRUCTIONS}\n\n{context_text.strip()}"
+
+    async def warm_up_prompt_cache(self):
+        # Prefill the instruction block so caption requests start on a cache hit; redone once keep_alive may have lapsed
+        global _prompt_cache_warmed_at
+        if _prompt_cache_warmed_at is not None and time.monotonic() - _prompt_cache_warmed_at < OLLAMA_KEEP_ALIVE_SECONDS:
+            return
+        try:
+            # Own session and short timeout, so it neither takes a caption connection nor stalls on a cold server
+            async with aiohttp.ClientSession(timeout=OLLAMA_WARM_UP_TIMEOUT) as session:
+                async with session.post(
+                    OLLAMA_CHAT_URL,
+                    json={
+                        "model": "llava",
+                        "messages": [{"role": "system", "content": CAPTION_INSTRUCTIONS}],
+                        "keep_alive": OLLAMA_KEEP_ALIVE,
+                        # Ollama treats num_predict <= 0 as unlimited, so decode a single token after the prefill
+                        "options": {"num_predict": 1},
+                        "stream": False
+                    }
+                ) as response:
+                    response.raise_for_status()
+            _prompt_cache_warmed_at = time.monotonic()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠ LLaVA prompt warm-up failed, continuing without it: {e}")
+
+    def encode_for_llava(self, image_bytes):
+        try:
+            img = Image.open(io.BytesIO(image_bytes))
+            if img.width <= LLAVA_MAX_IMAGE_SIZE[0] and img.height <= LLAVA_MAX_IMAGE_SIZE[1]:
+                return pybase64.b64encode_as_string(image_bytes)
+            # Convert before resizing: Pillow falls back to NEAREST for "P" and "1" images, aliasing thin lines and text
+            if img.mode in ("RGBA", "LA", "P"):
+                # JPEG has no alpha; flatten onto white like the slide background
+                img = img.convert("RGBA")
+                flattened = Image.new("RGB", img.size, (255, 255, 255))
+                flattened.paste(img, mask=img.getchannel("A"))
+                img = flattened
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail(LLAVA_MAX_IMAGE_SIZE, Image.LANCZOS)
+        except (UnidentifiedImageError, OSError, ValueError):
+            # Formats Pillow can't rasterise (e.g. EMF/WMF) go to LLaVA as-is
+            return pybase64.b64encode_as_string(image_bytes)
+
+        # Recycle JPEG buffers across images and encode straight from their memory, without a getvalue() copy
+        try:
+            buf = _jpeg_buffer_pool.pop()
+        except IndexError:
+            buf = io.BytesIO()
+        try:
+            buf.seek(0)
+            img.save(buf, format="JPEG", quality=LLAVA_JPEG_QUALITY)
+            with buf.getbuffer()[:buf.tell()] as jpeg_view:
+                return pybase64.b64encode_as_string(jpeg_view)
+        finally:
+            _jpeg_buffer_pool.append(buf)
+
+    async def generate_llava_caption(self, batcher, image_bytes, prompt_prefix):
+        # Resizing and encoding are CPU-bound; run them off the event loop so in-flight requests keep progressing
+        image_b64 = await asyncio.to_thread(self.encode_for_llava, image_bytes)
+
+        return await batcher.submit((prompt_prefix, image_b64))
+
+    async def post_llava_request(self, session, semaphore, prompt_prefix, image_b64):
+        async with semaphore:
+            async with session.post(
+                OLLAMA_CHAT_URL,
+                json={
+                    "model": "llava",
+                    "messages": [
+                        {"role": "system", "content": prompt_prefix},
+                        {"role": "user", "content": "Caption:", "images": [image_b64]}
+                    ],
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "options": LLAVA_OPTIONS,
+                    "stream": False
+                }
+            ) as response:
+                result = await response.json(content_type=None)
+                # Failures must raise so they take the error path and never reach the caption cache
+                if "error" in result:
+                    raise RuntimeError(f"Ollama error: {result['error']}")
+                response.raise_for_status()
+        caption = result.get("message", {}).get("content")
+        if not caption:
+            raise RuntimeError("Ollama returned no caption")
+        return caption
+
+    async def post_caption_batch(self, session, semaphore, items):
+        # Ollama takes one request per call, so a batch fans out under one scheduler
+        return await asyncio.gather(*[
+            self.post_llava_request(session, semaphore, prompt_prefix, image_b64)
+            for prompt_prefix, image_b64 in items
+        ], return_exceptions=True)
+
+    async def generate_captions(self, job_queue, on_caption=None):
+        # Stage B of the pipeline: captions jobs as the slide walk produces them, until a None sentinel
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CAPTIONS)
+        # Caps how many jobs are handed to encoding/captioning but not yet resolved; it doesn't bound memory,
+        # since every image blob stays alive in the open presentation package for the whole run
+        pending_encodes = asyncio.Semaphore(PIPELINE_DEPTH)
+        # One pooled keep-alive connection per in-flight request, reused for the whole file
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_CAPTIONS)
+        async with aiohttp.ClientSession(connector=connector, timeout=OLLAMA_TIMEOUT) as session:
+            # Extraction and encoding proceed while this runs; only the first batch flush waits for it
+            warm_up = asyncio.ensure_future(self.warm_up_prompt_cache())
+
+            async def post_after_warm_up(items):
+                await warm_up
+                return await self.post_caption_batch(session, semaphore, items)
+
+            batcher = AsyncBatcher(post_after_warm_up)
+
+            # Only send one request per distinct (image, context); repeats and earlier runs come from the cache
+            requests_by_key = {}
+
+            async def resolve(job, key):
+                try:
+                    if key in requests_by_key:
+                        caption = await requests_by_key[key]
+                        self.caption_cache[key] = caption
+                    else:
+                        caption = self.caption_cache[key]
+                    if on_caption is not None:
+                        on_caption(job, key, caption)
+                    return caption
+                finally:
+                    pending_encodes.release()
+
+            jobs = []
+            keys = []
+            tasks = []
+            while True:
+                job = await job_queue.get()
+                if job is None:
+                    break
+                await pending_encodes.acquire()
+                i, slide, image_file, image_bytes, shape, slide_context, prompt_prefix = job
+                key = self.caption_cache_key(image_bytes, slide_context)
+                if key not in self.caption_cache and key not in requests_by_key:
+                    requests_by_key[key] = asyncio.ensure_future(
+                        self.generate_llava_caption(batcher, image_bytes, prompt_prefix)
+                    )
+                # Keep only what the slide edits and final CSV need
+                jobs.append((i, slide, image_file, shape, slide_context))
+                keys.append(key)
+                tasks.append(asyncio.ensure_future(resolve(job, key)))
+
+            captions = await asyncio.gather(*tasks, return_exceptions=True)
+            await warm_up
+        return list(zip(jobs, keys, captions))
+
+    def load_completed_rows(self, csv_path):
+        # Rows left by an earlier, interrupted run: caption cache key -> caption
+        if not os.path.exists(csv_path):
+            return {}
+        with open(csv_path, encoding="utf-8", newline='') as f:
+            rows = list(csv.reader(f))
+        if not rows or rows[0] != CAPTIONS_CSV_HEADER:
+            # Older layout without keys; its captions can't be matched to the current images safely
+            return {}
+        return {row[4]: row[3] for row in rows[1:] if len(row) == len(CAPTIONS_CSV_HEADER) and row[3]}
+
+    def write_captions_csv(self, csv_path, rows):
+        # Replace the progress file with the final rows in slide order, dropping stale or duplicate entries
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CAPTIONS_CSV_HEADER)
+            writer.writerows(rows)
+        os.replace(tmp_path, csv_path)
 
     def add_caption_to_slide(self, slide, caption_text, image_shape):
         left = image_shape.left
-        top = image_shape.top + image_shape.height + Inches(0.1)
+        top = image_shape.top + image_shape.height + _CAP_TOP_PAD
         width = image_shape.width
-        height = Inches(0.4)
+        height = _CAP_H
 
         textbox = slide.shapes.add_textbox(left, top, width, height)
         text_frame = textbox.text_frame
@@ -139,65 +429,125 @@ class PowerPointExtractor:
         run.text = caption_text
 
         font = run.font
-        font.size = Pt(10)
+        font.size = _CAP_FONT
         font.italic = True
-        font.color.rgb = RGBColor(0, 0, 0)
+        font.color.rgb = _BLACK
 
         fill = textbox.fill
         fill.solid()
-        fill.fore_color.rgb = RGBColor(255, 255, 255)
+        fill.fore_color.rgb = _WHITE
 
         line = textbox.line
         line.fill.solid()
-        line.fill.fore_color.rgb = RGBColor(200, 200, 200)
+        line.fill.fore_color.rgb = _GREY
 
     def process_file(self):
+        return asyncio.run(self.process_file_async())
+
+    async def process_file_async(self):
         name_base = os.path.splitext(os.path.basename(self.ppt_path))[0]
         ppt = Presentation(self.ppt_path)
         out_csv_path = os.path.join(self.session_dir, f'{name_base}_captions.csv')
 
-        TOP_MARGIN_THRESHOLD = 1 * 360000
+        completed = self.load_completed_rows(out_csv_path)
+        if completed:
+            print(f"↻ Resuming: {len(completed)} captions already in {out_csv_path}")
+            # Resumed rows are only reused when the image bytes and slide context still match
+            self.caption_cache.update(completed)
 
-        with open(out_csv_path, 'w', encoding="utf-8", newline='') as file:
+        with open(out_csv_path, 'a' if completed else 'w', encoding="utf-8", newline='') as file:
             writer = csv.writer(file)
-            writer.writerow(["Slide", "Context", "Image", "Caption"])
-
-            for i, slide in enumerate(ppt.slides):
-                if i == 0:
-                    continue
-
-                slide_context = self.get_context_text(ppt.slides, i, window=1)
-                image_name_part = os.path.join(self.image_output_dir, f'{name_base}_slide{i+1}')
-
-                image_tuples = []
-                for shape in slide.shapes:
-                    # print(f"Image position: {shape.top / 360000:.2f} cm")
-                    image_tuples.extend(self.drill_for_images(shape, i + 1, image_name_part))
-
-                for image_file, shape in image_tuples:
-                    if image_file.startswith('INVALID') or shape is None:
-                        continue
-
-                    if shape.top < TOP_MARGIN_THRESHOLD:
-                        print(f"⚠ Skipping image {image_file} on slide {i+1} (too close to top)")
-                        continue
-
-                    full_image_path = os.path.join(self.image_output_dir, image_file)
-                    caption = self.generate_llava_caption(full_image_path, slide_context)
-                    self.add_caption_to_slide(slide, caption, shape)
-                    writer.writerow([i + 1, slide_context, image_file, caption])
+            if not completed:
+                writer.writerow(CAPTIONS_CSV_HEADER)
+
+            def write_row(job, key, caption):
+                # Persist every caption as soon as it arrives so a crash never costs finished inferences.
+                # Rows land in completion order; the file is rewritten in slide order once the run finishes.
+                if key in completed:
+                    return
+                i, _, image_file, _, _, slide_context, _ = job
+                writer.writerow([i + 1, slide_context, image_file, caption, key])
+                file.flush()
+                os.fsync(file.fileno())
+
+            slides = list(ppt.slides)  # Materialise once; each ppt.slides access re-walks the slide id list
+            slide_texts = [self.get_slide_text(s) for s in slides]
+            job_queue = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+
+            async def produce_jobs():
+                # Stage A: walk slides and extract images while earlier images are still with LLaVA
+                try:
+                    for i, slide in enumerate(slides):
+                        if i == 0:
+                            continue
+
+                        slide_context = self.get_context_text(slide_texts, i, window=1)
+                        prompt_prefix = self.build_caption_prefix(slide_context)
+                        image_name_part = os.path.join(self.image_output_dir, f'{name_base}_slide{i+1}')
+
+                        image_tuples = self.find_slide_images(slide, i + 1, image_name_part)
+                        for image_file, image_bytes, shape in image_tuples:
+                            if image_file.startswith('INVALID') or shape is None:
+                                continue
+
+                            await job_queue.put((i, slide, image_file, image_bytes, shape, slide_context, prompt_prefix))
+                finally:
+                    await job_queue.put(None)
+
+            # Rows are written from the event loop's single thread as each caption lands
+            _, captioned = await asyncio.gather(
+                produce_jobs(),
+                self.generate_captions(job_queue, on_caption=write_row)
+            )
+
+        # python-pptx isn't thread-safe, so slide edits stay serial after every caption is back
+        csv_rows = []
+        for (i, slide, image_file, shape, slide_context), key, caption in captioned:
+            if isinstance(caption, Exception):
+                print(f"[ERROR] Caption failed for {image_file} on slide {i+1}: {caption}")
+                continue
+            self.add_caption_to_slide(slide, caption, shape)
+            csv_rows.append([i + 1, slide_context, image_file, caption, key])
+        self.write_captions_csv(out_csv_path, csv_rows)
 
         output_ppt = os.path.join(self.session_dir, f'{name_base}_captioned.pptx')
         ppt.save(output_ppt)
         print(f"✅ Saved modified presentation as {output_ppt}")
 
+        self.save_caption_cache()
+        await asyncio.gather(*self.pending_writes)
+        self.pending_writes = []
+
         if self.invalid_images:
             print(f'⚠ WARNING: {len(self.invalid_images)} invalid images found: {self.invalid_images}')
 
         return output_ppt
 
+# A single lazily started worker serves every upload; captioning is I/O-bound against Ollama,
+# so concurrency comes from the event loop inside each job rather than from extra threads.
+_caption_queue = queue.Queue()
+_caption_worker = None
+_caption_worker_lock = threading.Lock()
+
+def _caption_server_loop():
+    while True:
+        extractor, future = _caption_queue.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            future.set_result(asyncio.run(extractor.process_file_async()))
+        except Exception as e:
+            future.set_exception(e)
+
 def run_captioning_threaded(input_path, session_dir):
-    future = executor.submit(PowerPointExtractor(input_path, session_dir).process_file)
+    global _caption_worker
+    with _caption_worker_lock:
+        if _caption_worker is None or not _caption_worker.is_alive():
+            _caption_worker = threading.Thread(target=_caption_server_loop, name="caption-worker", daemon=True)
+            _caption_worker.start()
+
+    future = Future()
+    _caption_queue.put((PowerPointExtractor(input_path, session_dir), future))
     return future
 
 def main():
@@ -3,7 +3,6 @@ import os
 import shutil
 import uuid
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 from main import PowerPointExtractor, convert_ppt_to_pptx, run_captioning_threaded
 import time
 
@@ -107,6 +106,13 @@ else:
 
         with st.spinner("⚙️ Generating image captions using AI... Please wait."):
             future = run_captioning_threaded(input_path, SESSION_DIR)
+            # Poll the worker and report progress in place instead of blocking on stdout prints
+            status = st.empty()
+            started = time.time()
+            while not future.done():
+                status.caption(f"⏳ Captioning in progress ({int(time.time() - started)}s elapsed)")
+                time.sleep(0.5)
+            status.empty()
             output_pptx_path = future.result()
 
         if output_pptx_path and os.path.exists(output_pptx_path):